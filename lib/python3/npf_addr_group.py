@@ -1,13 +1,142 @@
 #!/usr/bin/env python3
 #
-# Copyright (c) 2019-2020, AT&T Intellectual Property.
+# Copyright (c) 2019-2021, AT&T Intellectual Property.
 # All rights reserved.
 #
 # SPDX-License-Identifier: LGPL-2.1-only
 #
 
+import fcntl
+import os
+import re
+from contextlib import contextmanager
+
 import vplaned
 
+from vyatta.npf.npf_prefix import IP_FAMILY, address_interval, range_interval
+from vyatta.npf.npf_prefix import overlapping_intervals, prefix_str
+
+
+#
+# Directory holding the prefixes last bulk-loaded into each address-group by
+# npf-address-group-load, one file per group
+#
+ADDR_GROUP_LOAD_DIR = "/run/vyatta/npf-address-group-load"
+
+#
+# Valid address-group names (the fw-types group-name).  As these contain no
+# '/' or '.', a group's files are always directly within ADDR_GROUP_LOAD_DIR.
+#
+ADDR_GROUP_NAME = re.compile(r'[-_A-Za-z0-9]*[-_A-Za-z][-_A-Za-z0-9]*')
+
+
+def address_group_name_valid(name):
+    """Is this a valid address-group name?"""
+
+    return ADDR_GROUP_NAME.fullmatch(name) is not None
+
+
+def address_group_load_file(name):
+    """Path of the file of prefixes last bulk-loaded into an address-group.
+    Raises ValueError if the name is not a valid address-group name.
+
+    """
+
+    if not address_group_name_valid(name):
+        raise ValueError("Invalid address-group name '{}'".format(name))
+
+    return os.path.join(ADDR_GROUP_LOAD_DIR, name)
+
+
+#
+# address_group_load_lock
+#
+# Serializes the bulk loads of an address-group with each other, and with
+# end-resource-groups forgetting the prefixes loaded into a deleted group, so
+# that each load diffs against the prefixes recorded by the one before it.
+#
+# The lock is taken on a file beside the state file rather than on the state
+# file itself, as each load replaces the state file.  Group names cannot
+# contain a '.', so the lock file name cannot be that of another group.
+#
+@contextmanager
+def address_group_load_lock(name):
+    """Hold the bulk-load lock of an address-group"""
+
+    lock_file = address_group_load_file(name) + ".lock"
+    os.makedirs(ADDR_GROUP_LOAD_DIR, exist_ok=True)
+    with open(lock_file, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+#
+# address_group_load_line, address_group_load_interval
+#
+# Each prefix loaded into an address-group is recorded in its state file as
+# a line of its IP version and its first and last addresses, with the
+# addresses as fixed-width hex so that the lines sort into address order as
+# strings.  npf-address-group-load uses the same format for its temporary
+# files.
+#
+def address_group_load_line(version, first, last):
+    """Returns the state file line of an interval"""
+
+    return "{} {:032x} {:032x}\n".format(version, first, last)
+
+
+def address_group_load_interval(line):
+    """Returns the (version, first, last) interval of a state file line"""
+
+    version, first, last = line.split()
+    return int(version), int(first, 16), int(last, 16)
+
+
+def address_group_entry_intervals(group_cfg):
+    """Returns the sorted (version, first, last, entry) intervals of the
+    configured addresses, prefixes and ranges of an address-group.
+
+    """
+
+    intervals = []
+
+    for addr in group_cfg.get('address', []):
+        intervals.append(address_interval(addr) + (addr,))
+
+    for start_addr, value in group_cfg.get('address-range', {}).items():
+        if 'to' not in value:
+            continue
+        interval = range_interval(start_addr, value['to'])
+        if interval:
+            intervals.append(interval + ("{}-{}".format(start_addr,
+                                                        value['to']),))
+
+    intervals.sort()
+    return intervals
+
+
+#
+# address_group_load_overlaps
+#
+# Bulk-loaded prefixes are kept in the same dataplane table as the
+# configured entries of the group, so must not overlap them: removing either
+# would remove the addresses in common from the group.  An optimized group
+# covers exactly the addresses of its configured entries, so these are
+# checked in either case.
+#
+# lines are the sorted state file lines of the loaded prefixes.
+#
+def address_group_load_overlaps(group_cfg, lines):
+    """Yields each (configured entry, loaded prefix) pair that overlap"""
+
+    loaded = (address_group_load_interval(line) for line in lines)
+
+    for (_, _, _, entry), (version, first, last) in overlapping_intervals(
+            address_group_entry_intervals(group_cfg), loaded):
+        _, bits = IP_FAMILY[version]
+        yield entry, prefix_str(version, first,
+                                bits - (last - first).bit_length())
+
 
 #
 # Fetch address-groups from dataplane and show
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2021, AT&T Intellectual Property.
+# All rights reserved.
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+
+import os
+import socket
+import stat
+import struct
+import tempfile
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+#
+# CGNAT event export.  The dataplane sends the protobuf events of each type
+# ('session', 'subscriber', ...) to a zmq endpoint that the fluentbit zmq
+# input listens on, queueing at most the high water mark of events.
+#
+EVENT_ENDPOINT = "ipc:///var/run/vyatta/cgnat-event-{}"
+EVENT_HWM_CRITICAL = 100000      # ie very large but not infinite
+EVENT_HWM_NONCRITICAL = 100000   # ie very large but not infinite
+EVENT_MEM_BUF_LIMIT = 5          # default fluentbit Mem_Buf_Limit, MB
+
+#
+# Subscriber list cache file header: magic, count, time (secs)
+#
+SUBS_CACHE_MAGIC = b'CGNSUBS\0'
+SUBS_CACHE_HDR = struct.Struct('=8sIQ')
+
+
+def _prefix_range(prefix):
+    """Return the first and last addresses (uints) of an 'a.b.c.d' or
+    'a.b.c.d/len' string.
+
+    """
+    addr, _, plen = prefix.partition('/')
+    plen = int(plen) if plen else 32
+
+    if plen < 0 or plen > 32:
+        raise ValueError("invalid prefix length: %s" % (prefix))
+
+    mask = (0xffffffff << (32 - plen)) & 0xffffffff
+    first = struct.unpack("!I", socket.inet_aton(addr))[0] & mask
+
+    return first, first | (~mask & 0xffffffff)
+
+
+#
+# prefix_batches
+#
+# Groups a sorted list of IPv4 addresses (uints) into batches that may each
+# be fetched from the dataplane with a single address or prefix filter.
+#
+# Each batch is the largest aligned prefix that starts with the next address
+# in the list, does not include any address from a previous batch, and
+# contains no more than 'max_count' addresses from the list.  An address with
+# no close neighbours is fetched on its own.
+#
+def prefix_batches(addrs, max_count):
+    """Group a sorted list of addresses (uints) into batches.
+
+    Returns a list of (prefix, start, end) tuples, where 'prefix' is the
+    address or prefix string for the request, and addrs[start] to
+    addrs[end - 1] are the addresses it covers.
+    """
+
+    batches = []
+    prev = -1
+    i = 0
+
+    while i < len(addrs):
+        addr = addrs[i]
+        plen = 32
+        end = i + 1
+
+        # Widen the prefix one bit at a time while it remains valid
+        while plen > 0:
+            mask = (0xffffffff << (33 - plen)) & 0xffffffff
+            first = addr & mask
+            last = first | (~mask & 0xffffffff)
+
+            if first <= prev:
+                break
+
+            tmp = bisect_right(addrs, last, i)
+            if tmp - i > max_count:
+                break
+
+            plen -= 1
+            end = tmp
+
+        mask = (0xffffffff << (32 - plen)) & 0xffffffff
+        prefix = socket.inet_ntoa(struct.pack("!I", addr & mask))
+        if plen < 32:
+            prefix = "%s/%u" % (prefix, plen)
+
+        batches.append((prefix, i, end))
+        prev = addrs[end - 1]
+        i = end
+
+    return batches
+
+
+#
+# class SubscriberIndex
+#
+# A sorted, de-duplicated array of CGNAT subscriber addresses (uints), as
+# returned by 'cgn-op list subscribers'.  Membership, range and prefix queries
+# are done by bisection rather than by scanning the list, so stay fast with
+# hundreds of thousands of subscribers.
+#
+# The complete subscriber list may be saved to a cache file, and re-used by
+# a later command within a few seconds (see load and save), so that
+# successive show commands for different prefixes do not each need to fetch
+# the list from the dataplane.
+#
+class SubscriberIndex:
+    """Sorted array of subscriber addresses"""
+
+    def __init__(self, addrs=()):
+        self._addrs = array('I', sorted(set(addrs)))
+
+    def __len__(self):
+        return len(self._addrs)
+
+    def __iter__(self):
+        return iter(self._addrs)
+
+    def __getitem__(self, index):
+        return self._addrs[index]
+
+    def __contains__(self, addr):
+        i = bisect_left(self._addrs, addr)
+        return i < len(self._addrs) and self._addrs[i] == addr
+
+    def range(self, first, last):
+        """Return a new index of the addresses from first to last"""
+        new = SubscriberIndex()
+        new._addrs = self._addrs[bisect_left(self._addrs, first):
+                                 bisect_right(self._addrs, last)]
+        return new
+
+    def prefix(self, prefix):
+        """Return a new index of the addresses matching an 'a.b.c.d' or
+        'a.b.c.d/len' string.
+
+        """
+        return self.range(*_prefix_range(prefix))
+
+    def batches(self, max_count):
+        """See prefix_batches"""
+        return prefix_batches(self._addrs, max_count)
+
+    @staticmethod
+    def cache_path():
+        """Per-user subscriber list cache file"""
+        cache_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+        return os.path.join(cache_dir, "cgnat-subscribers-%u.cache" %
+                            (os.getuid()))
+
+    @classmethod
+    def load(cls, path, max_age):
+        """Load an index from a cache file.  Returns None if the file does
+        not exist, is older than 'max_age' seconds, or is not owned by and
+        only writable by the current user.
+
+        """
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+        except OSError:
+            return None
+
+        with os.fdopen(fd, 'rb') as f:
+            st = os.fstat(fd)
+            if not stat.S_ISREG(st.st_mode) or st.st_uid != os.getuid() or \
+               (st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)) != 0:
+                return None
+
+            data = f.read()
+
+        if len(data) < SUBS_CACHE_HDR.size:
+            return None
+
+        magic, count, saved = SUBS_CACHE_HDR.unpack_from(data)
+        age = time.time() - saved
+
+        if magic != SUBS_CACHE_MAGIC or age < 0 or age > max_age:
+            return None
+
+        addrs = array('I')
+        addrs.frombytes(data[SUBS_CACHE_HDR.size:])
+        if len(addrs) != count:
+            return None
+
+        new = cls()
+        new._addrs = addrs
+        return new
+
+    def save(self, path):
+        """Save the index to a cache file.  Errors are ignored since the
+        cache is only an optimization.
+
+        """
+        try:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(SUBS_CACHE_HDR.pack(SUBS_CACHE_MAGIC,
+                                            len(self._addrs),
+                                            int(time.time())))
+                f.write(self._addrs.tobytes())
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+
+#
+# Port-block utilization map characters, for a slice of an address's port
+# blocks that is empty, less than half used, half or more used, and full.
+#
+UTIL_MAP_CHARS = ".-+#"
+UTIL_MAP_WIDTH = 32
+
+#
+# Addresses with at least this percentage of port blocks in use are reported
+# as near to exhaustion.
+#
+UTIL_NEAR_EXHAUSTION = 90
+
+
+def _popcount(value):
+    return bin(value).count('1')
+
+
+#
+# class PortBlockUtilization
+#
+# Port-block utilization of a pool of CGNAT public addresses, as returned by
+# 'cgn-op show apm'.
+#
+# The allocated port blocks of each address are packed into a bitmap (an int
+# with bit n set if block n is in use), and the ports used in each block are
+# summed per protocol.
+#
+# An address may be added more than once, e.g. once per protocol or once by
+# each dataplane.  The ports used by a block are counted once per protocol:
+# a later entry for the same block and protocol, e.g. from another
+# dataplane, is dropped rather than summed.  To track this, each address
+# also has a bitmap per protocol of the blocks whose ports have been counted.
+#
+# summary() then makes a single pass over the addresses to work out the
+# per-address and pool-wide occupancy, the fragmentation of the free blocks,
+# how close each address is to exhaustion, and a histogram of the
+# per-address utilization from which the percentiles are taken.
+#
+class PortBlockUtilization:
+    """Port-block utilization of CGNAT public addresses"""
+
+    def __init__(self, near=UTIL_NEAR_EXHAUSTION):
+        self._near = near
+        self._addrs = {}
+
+    def __len__(self):
+        return len(self._addrs)
+
+    def add(self, pub):
+        """Add one 'apm' entry"""
+
+        key = struct.unpack("!I", socket.inet_aton(pub['address']))[0]
+        entry = self._addrs.get(key)
+        if not entry:
+            nports = pub['port_end'] - pub['port_start'] + 1
+            entry = [pub['address'], pub['nblocks'], nports, 0, {}, {}]
+            self._addrs[key] = entry
+
+        # Set the bits in one go rather than creating a new int per block
+        nbytes = (entry[1] + 7) // 8
+        bits = bytearray(entry[3].to_bytes(nbytes, 'little'))
+        ports = entry[4]
+        counted = entry[5]
+        proto_bits = {}
+
+        for block in pub.get('blocks') or []:
+            blk = block['block']
+            bit = 1 << (blk & 7)
+            bits[blk >> 3] |= bit
+
+            for proto in block.get('protocols') or []:
+                name = proto['protocol']
+
+                pbits = proto_bits.get(name)
+                if pbits is None:
+                    pbits = bytearray(counted.get(name, 0).to_bytes(nbytes,
+                                                                    'little'))
+                    proto_bits[name] = pbits
+
+                # Only the first entry for a block and protocol is counted
+                if pbits[blk >> 3] & bit:
+                    continue
+                pbits[blk >> 3] |= bit
+
+                ports[name] = ports.get(name, 0) + proto['ports_used']
+
+        entry[3] = int.from_bytes(bits, 'little')
+        for name, pbits in proto_bits.items():
+            counted[name] = int.from_bytes(pbits, 'little')
+
+    @staticmethod
+    def _map(used, nblocks):
+        """Compact map of an address's port blocks, one character for each
+        of up to UTIL_MAP_WIDTH equal slices.
+
+        """
+        width = min(nblocks, UTIL_MAP_WIDTH)
+        chars = []
+        lo = 0
+
+        for i in range(1, width + 1):
+            hi = i * nblocks // width
+            count = _popcount((used >> lo) & ((1 << (hi - lo)) - 1))
+            if count == 0:
+                chars.append(UTIL_MAP_CHARS[0])
+            elif count == hi - lo:
+                chars.append(UTIL_MAP_CHARS[3])
+            elif 2 * count < hi - lo:
+                chars.append(UTIL_MAP_CHARS[1])
+            else:
+                chars.append(UTIL_MAP_CHARS[2])
+            lo = hi
+
+        return "".join(chars)
+
+    def summary(self):
+        """Returns a dictionary with the pool-wide 'summary', the
+        utilization 'percentiles' and 'histogram', and a list of
+        'addresses' in address order.
+
+        """
+        addresses = []
+        pct_count = [0] * 101
+        ports_used = {}
+        nblocks_total = 0
+        used_total = 0
+        exhausted = 0
+        near = 0
+        frag_total = 0.0
+
+        for key in sorted(self._addrs):
+            addr, nblocks, nports, used, ports, _ = self._addrs[key]
+
+            nused = _popcount(used)
+            nfree = nblocks - nused
+
+            # Runs of free blocks
+            free = ~used & ((1 << nblocks) - 1)
+            runs = [len(run) for run in bin(free)[2:].split('0') if run] \
+                if free else []
+            largest = max(runs) if runs else 0
+
+            # Fragmentation is the fraction of the free blocks that are not
+            # in the largest run of free blocks
+            frag = 1.0 - largest / nfree if nfree else 0.0
+
+            pct = 100 * nused // nblocks if nblocks else 100
+            pct_count[pct] += 1
+
+            nblocks_total += nblocks
+            used_total += nused
+            frag_total += frag
+            if nfree == 0:
+                exhausted += 1
+            elif pct >= self._near:
+                near += 1
+
+            for name, count in ports.items():
+                ports_used[name] = ports_used.get(name, 0) + count
+
+            addresses.append({
+                'address': addr,
+                'port_count': nports,
+                'nblocks': nblocks,
+                'blocks_used': nused,
+                'blocks_free': nfree,
+                'utilization': round(100.0 * nused / nblocks, 1)
+                if nblocks else 100.0,
+                'free_runs': len(runs),
+                'largest_free_run': largest,
+                'fragmentation': round(100.0 * frag, 1),
+                'ports_used': sum(ports.values()),
+                'bitmap': "0x%x" % (used),
+                'map': self._map(used, nblocks),
+            })
+
+        naddrs = len(addresses)
+
+        # Percentiles, from the count of addresses at each whole percent
+        percentiles = {}
+        for name, p in (('p50', 50), ('p90', 90), ('p99', 99), ('max', 100)):
+            need = max(-(-p * naddrs // 100), 1)
+            total = 0
+            for pct, count in enumerate(pct_count):
+                total += count
+                if total >= need:
+                    break
+            percentiles[name] = pct if naddrs else 0
+
+        # Histogram in steps of 10%, with full addresses on their own
+        histogram = []
+        for lo in range(0, 100, 10):
+            histogram.append({'range': "%u-%u%%" % (lo, lo + 9),
+                              'addresses': sum(pct_count[lo:lo + 10])})
+        histogram.append({'range': "100%", 'addresses': pct_count[100]})
+
+        summary = {
+            'addresses': naddrs,
+            'nblocks': nblocks_total,
+            'blocks_used': used_total,
+            'utilization': round(100.0 * used_total / nblocks_total, 1)
+            if nblocks_total else 0.0,
+            'exhausted': exhausted,
+            'near_exhaustion': near,
+            'near_exhaustion_threshold': self._near,
+            'fragmentation': round(100.0 * frag_total / naddrs, 1)
+            if naddrs else 0.0,
+            'ports_used': ports_used,
+        }
+
+        return {'summary': summary,
+                'percentiles': percentiles,
+                'histogram': histogram,
+                'addresses': addresses}
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2021, AT&T Intellectual Property.
+# All rights reserved.
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+import vplaned
+
+
+#
+# class DataplaneClient
+#
+# Op-mode scripts that fetch large tables (e.g. the session table) do so in
+# batches of a few thousand entries.  Opening a vplaned controller and
+# reconnecting to every dataplane for each batch quickly dominates the time
+# taken, so this class holds the controller and the dataplane connections open
+# for the lifetime of the 'with' block instead.
+#
+# All dataplane I/O is done by a single worker thread.  This serializes
+# access to the zmq sockets, and allows a caller to submit the next request
+# and have it in flight while it processes the replies to the previous one,
+# e.g.:
+#
+#   with DataplaneClient() as client:
+#       future = client.submit(cmd)
+#       while future:
+#           replies = future.result()
+#           future = client.submit(next_cmd) if more else None
+#           ... process replies ...
+#
+class DataplaneClient:
+    """Persistent connections to all dataplanes for a series of commands"""
+
+    def __init__(self):
+        self._stack = None
+        self._executor = None
+        self._dataplanes = []
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        try:
+            controller = self._stack.enter_context(vplaned.Controller())
+            for dp in controller.get_dataplanes():
+                self._stack.enter_context(dp)
+                self._dataplanes.append(dp)
+        except BaseException:
+            self._stack.close()
+            raise
+
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Let any request still in flight complete before disconnecting
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self._dataplanes = []
+        self._stack.close()
+        return False
+
+    @property
+    def dataplanes(self):
+        return self._dataplanes
+
+    def _json_command(self, cmd):
+        return [dp.json_command(cmd) for dp in self._dataplanes]
+
+    def submit(self, cmd):
+        """Send a command to every dataplane in the background.  Returns a
+        Future whose result is the list of json replies, one per dataplane.
+
+        """
+        return self._executor.submit(self._json_command, cmd)
+
+    def json_command(self, cmd):
+        """Send a command to every dataplane and wait for the json replies"""
+        return self.submit(cmd).result()
+
+    def submit_one(self, dp, cmd):
+        """Send a command to one of the dataplanes in the background.
+        Returns a Future whose result is its json reply.
+
+        """
+        return self._executor.submit(dp.json_command, cmd)
+
+
+#
+# json_commands_concurrent
+#
+# Sends several commands to every dataplane at once, e.g. to collect state
+# that is spread over a few different commands, so that the time taken is
+# that of the slowest command rather than the sum of them all.
+#
+# A dataplane connection can only have one request outstanding, so each
+# command gets its own connection to each dataplane, opened and used by one
+# worker thread.  Only the one controller is used to find the dataplanes.
+#
+def _json_command(dp, cmd):
+    with dp:
+        return dp.json_command(cmd)
+
+
+def json_commands_concurrent(cmds):
+    """Send each of 'cmds' to every dataplane concurrently.  Returns a
+    dictionary of the list of json replies, one per dataplane, to each
+    command.
+
+    """
+    with vplaned.Controller() as controller:
+        requests = [(cmd, dp) for cmd in cmds
+                    for dp in controller.get_dataplanes()]
+
+        if not requests:
+            return {cmd: [] for cmd in cmds}
+
+        with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+            futures = [(cmd, executor.submit(_json_command, dp, cmd))
+                       for cmd, dp in requests]
+
+            replies = {cmd: [] for cmd in cmds}
+            for cmd, future in futures:
+                replies[cmd].append(future.result())
+
+    return replies
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2019-2021, AT&T Intellectual Property.
+# All rights reserved.
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+
+#
+# DSCP name-to-value conversion table, shared by the dscp-groups of the
+# resources group VCI component and the dscp matches of the GPC component.
+#
+DSCPTABLE = {
+    'default': 0,
+    'cs0':     0,
+    'cs1':     8,
+    'cs2':     16,
+    'cs3':     24,
+    'cs4':     32,
+    'cs5':     40,
+    'cs6':     48,
+    'cs7':     56,
+    'af11':    10,
+    'af12':    12,
+    'af13':    14,
+    'af21':    18,
+    'af22':    20,
+    'af23':    22,
+    'af31':    26,
+    'af32':    28,
+    'af33':    30,
+    'af41':    34,
+    'af42':    36,
+    'af43':    38,
+    'ef':      46,
+    'va':      44,
+}
+
+
+DSCP_MAX = 63
+
+
+def dscp_value(dscp):
+    """Convert a dscp name or number to its value"""
+
+    value = DSCPTABLE.get(dscp)
+    if value is None:
+        value = int(dscp)
+        if not 0 <= value <= DSCP_MAX:
+            raise ValueError(f"Invalid dscp value {dscp}")
+    return value
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2021, AT&T Intellectual Property.
+# All rights reserved.
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+
+import itertools
+import socket
+from collections import deque
+
+
+#
+# Address family and number of address bits for each IP version
+#
+IP_FAMILY = {4: (socket.AF_INET, 32), 6: (socket.AF_INET6, 128)}
+
+
+#
+# address_value
+#
+# The IP version and integer value of an address.  This is called for every
+# entry in an address-group, so uses inet_pton directly rather than netaddr.
+#
+def address_value(addr):
+    """Returns the (version, value) of an IPv4 or IPv6 address"""
+
+    version = 6 if ':' in addr else 4
+    family, _ = IP_FAMILY[version]
+    return version, int.from_bytes(socket.inet_pton(family, addr), 'big')
+
+
+def address_str(version, value):
+    """Returns the string form of an integer address"""
+
+    family, bits = IP_FAMILY[version]
+    return socket.inet_ntop(family, value.to_bytes(bits // 8, 'big'))
+
+
+def prefix_str(version, value, plen):
+    """Returns the string form of a prefix, or of an address for a host
+    prefix
+
+    """
+
+    _, bits = IP_FAMILY[version]
+    prefix = address_str(version, value)
+    if plen != bits:
+        prefix += "/{}".format(plen)
+    return prefix
+
+
+#
+# address_interval, range_interval
+#
+# The IP version and the integer values of the first and last addresses
+# covered by an address (or prefix) or by a range.  range_interval returns
+# None for an invalid range.
+#
+def address_interval(addr):
+    """Returns the (version, first, last) addresses of an address or prefix"""
+
+    addr, _, plen = addr.partition('/')
+    version, value = address_value(addr)
+
+    if not plen:
+        return version, value, value
+
+    _, bits = IP_FAMILY[version]
+    hostmask = (1 << (bits - int(plen))) - 1
+    first = value & ~hostmask
+    return version, first, first | hostmask
+
+
+def range_interval(start_addr, end_addr):
+    """Returns the (version, first, last) addresses of a range, or None"""
+
+    start_version, start_value = address_value(start_addr)
+    end_version, end_value = address_value(end_addr)
+
+    if start_version != end_version or start_value > end_value:
+        return None
+
+    return start_version, start_value, end_value
+
+
+#
+# merge_intervals, merge_sorted_intervals
+#
+# Merges a list of (first, last) intervals of one address family into the
+# sorted list of disjoint intervals that cover the same addresses.  Intervals
+# that overlap or are adjacent are merged.
+#
+# merge_sorted_intervals does the same for intervals that are already
+# sorted, one at a time, so that it can be used on a stream of any length.
+#
+def merge_sorted_intervals(intervals):
+    """Yields the disjoint union of an iterable of sorted intervals"""
+
+    merged = None
+
+    for first, last in intervals:
+        if merged and first <= merged[1] + 1:
+            if last > merged[1]:
+                merged[1] = last
+        else:
+            if merged:
+                yield tuple(merged)
+            merged = [first, last]
+
+    if merged:
+        yield tuple(merged)
+
+
+def merge_intervals(intervals):
+    """Returns the sorted, disjoint union of a list of intervals"""
+
+    return list(merge_sorted_intervals(sorted(intervals)))
+
+
+#
+# overlapping_intervals
+#
+# Finds the intervals of one address-group that overlap those of another,
+# in one pass over each.  Both are sorted by (version, first, last), and the
+# second must be disjoint, e.g. a prefix cover, so that it can be streamed
+# from a file.  The intervals of the first may have further fields after the
+# addresses, such as the entry they came from.
+#
+def overlapping_intervals(intervals, disjoint):
+    """Yields each (interval, disjoint interval) pair that overlap"""
+
+    disjoint = iter(disjoint)
+    pending = deque()
+
+    for interval in intervals:
+        version, first, last = interval[:3]
+
+        # Drop the disjoint intervals that end before this one starts.  As
+        # the intervals are sorted by their start, no later one overlaps
+        # them either.
+        while True:
+            if not pending:
+                other = next(disjoint, None)
+                if other is None:
+                    break
+                pending.append(other)
+            if (pending[0][0], pending[0][2]) >= (version, first):
+                break
+            pending.popleft()
+
+        for i in itertools.count():
+            if i == len(pending):
+                other = next(disjoint, None)
+                if other is None:
+                    break
+                pending.append(other)
+            other = pending[i]
+            if (other[0], other[1]) > (version, last):
+                break
+            yield interval, other
+
+
+#
+# interval_prefixes
+#
+# The minimal list of prefixes that exactly cover an interval.  Each prefix
+# is the largest one that starts at the next uncovered address, which is
+# limited both by the alignment of that address and by the number of
+# addresses left in the interval.
+#
+def interval_prefixes(first, last, bits):
+    """Yields the (address, prefix length) of each prefix covering an
+    interval
+
+    """
+
+    while first <= last:
+        if first:
+            size = min((first & -first).bit_length(),
+                       (last - first + 1).bit_length()) - 1
+        else:
+            size = min(bits, (last - first + 1).bit_length() - 1)
+
+        yield first, bits - size
+        first += 1 << size
+
+
+#
+# prefix_cover
+#
+# Compiles the addresses, prefixes and ranges of an address-group into the
+# minimal list of prefixes that covers the same addresses.  Host prefixes
+# are given as plain addresses, as they would be configured.  The IPv4
+# prefixes are listed before the IPv6 ones, each in address order.
+#
+# Invalid ranges are ignored.
+#
+def prefix_cover(addresses, ranges):
+    """Returns the minimal list of prefixes covering a list of addresses
+    and prefixes and a list of (start, end) ranges
+
+    """
+
+    intervals = {4: [], 6: []}
+
+    for addr in addresses:
+        version, first, last = address_interval(addr)
+        intervals[version].append((first, last))
+
+    for start_addr, end_addr in ranges:
+        interval = range_interval(start_addr, end_addr)
+        if interval:
+            version, first, last = interval
+            intervals[version].append((first, last))
+
+    prefixes = []
+
+    for version in sorted(intervals):
+        _, bits = IP_FAMILY[version]
+
+        for first, last in merge_intervals(intervals[version]):
+            prefixes.extend(prefix_str(version, value, plen)
+                            for value, plen in interval_prefixes(first,
+                                                                 last, bits))
+
+    return prefixes
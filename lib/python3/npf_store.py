@@ -1,22 +1,118 @@
 #!/usr/bin/env python3
 #
-# Copyright (c) 2019-2020, AT&T Intellectual Property.
+# Copyright (c) 2019-2021, AT&T Intellectual Property.
 # All rights reserved.
 #
 # SPDX-License-Identifier: LGPL-2.1-only
 #
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 from vplaned import Controller
 
 
+#
+# Maximum number of store operations queued by a StoreBatch before the
+# caller waits for the oldest to complete
+#
+STORE_BATCH_PENDING = 1024
+
+# The StoreBatch in use, if any
+_batch = None
+
+
 def store_cfg(key, command, action, dbg=None, intf="ALL"):
+    if dbg:
+        dbg.pprint("store_cfg: key: {}; cmd: {}; "
+                   "action: {}; interface: {}"
+                   .format(key, command, action, intf))
+
+    if _batch:
+        _batch.store(key, command, action, intf)
+        return
+
     with Controller() as ctrl:
-        if dbg:
-            dbg.pprint("store_cfg: key: {}; cmd: {}; "
-                       "action: {}; interface: {}"
-                       .format(key, command, action, intf))
         ctrl.store(key, command, action=action, interface=intf)
 
 
 def dataplane_commit(dbg):
     store_cfg("npf-cfg commit", "npf-cfg commit", "SET", dbg)
+
+
+#
+# class StoreBatch
+#
+# store_cfg opens a new controller connection for each key, which for a
+# commit of many thousands of keys (e.g. a large address-group) takes far
+# longer than storing the keys themselves.
+#
+# Within a 'with StoreBatch():' block store_cfg instead sends each key over
+# the one controller connection held by the batch.  The keys are stored by a
+# single worker thread, in the order store_cfg was called, while the caller
+# carries on working out the next keys.  Any error storing a key is raised
+# by a later store_cfg or at the end of the block, and no further keys are
+# stored.
+#
+#   with StoreBatch():
+#       for ...:
+#           store_cfg(key, cmd, "SET", dbg)
+#       dataplane_commit(dbg)
+#
+class StoreBatch:
+    """Store a series of keys over one controller connection"""
+
+    def __init__(self):
+        self._ctrl = None
+        self._executor = None
+        self._pending = deque()
+        self._prev = None
+        self._failed = False
+
+    def __enter__(self):
+        global _batch
+
+        self._ctrl = Controller()
+        self._ctrl.__enter__()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._prev = _batch
+        _batch = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _batch
+
+        _batch = self._prev
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+            self._ctrl.__exit__(exc_type, exc_value, traceback)
+        return False
+
+    def _store(self, key, command, action, intf):
+        # Don't store any more keys after an error
+        if self._failed:
+            return
+
+        try:
+            self._ctrl.store(key, command, action=action, interface=intf)
+        except BaseException:
+            self._failed = True
+            raise
+
+    def store(self, key, command, action, intf="ALL"):
+        """Queue a key to be stored"""
+
+        while len(self._pending) >= STORE_BATCH_PENDING:
+            self._pending.popleft().result()
+
+        self._pending.append(self._executor.submit(self._store, key, command,
+                                                   action, intf))
+
+    def flush(self):
+        """Wait for all the queued keys to be stored"""
+
+        while self._pending:
+            self._pending.popleft().result()
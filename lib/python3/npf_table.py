@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2021, AT&T Intellectual Property.
+# All rights reserved.
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+
+import sys
+from contextlib import contextmanager
+
+
+#
+# Default output buffer size for buffered_stdout
+#
+TABLE_BUFSIZE = 1024 * 1024
+
+
+#
+# buffered_stdout
+#
+# Replace sys.stdout with a writer that has a large buffer for the duration
+# of the 'with' block, so that a table of many thousands of lines is not
+# written to a pipe or file a few lines at a time.  print() and
+# TableRenderer both write through it.
+#
+@contextmanager
+def buffered_stdout(bufsize=TABLE_BUFSIZE):
+    """Buffer everything written to sys.stdout in the 'with' block"""
+
+    sys.stdout.flush()
+    orig = sys.stdout
+    out = open(orig.fileno(), 'w', buffering=bufsize, closefd=False)
+    sys.stdout = out
+    try:
+        yield out
+    finally:
+        sys.stdout = orig
+        out.close()
+
+
+#
+# class Column
+#
+# One column of a table.
+#
+#   title   Column heading
+#   width   Minimum width.  0 for the last column if it is not padded.
+#   left    Left-justify rather than right-justify
+#   grow    The width increases to fit the widest value shown so far
+#   sep     Separator before the column.  Ignored for the first column.
+#   group   Columns in the same group always have the same width
+#
+class Column:
+    """A table column"""
+
+    def __init__(self, title, width, left=False, grow=False, sep=' ',
+                 group=None):
+        self.title = title
+        self.width = width
+        self.left = left
+        self.grow = grow
+        self.sep = sep
+        self.group = group
+
+
+#
+# class TableRenderer
+#
+# Renders rows of a table, one batch at a time.  Each row is a tuple with one
+# value per column.
+#
+# The column widths are only checked once per batch, against the widest
+# value in the batch, and the format string for a row is only rebuilt when a
+# width changes.  Each row is then a single '%' operation, and each batch a
+# single write.
+#
+# The heading is written before the first row, whenever a column width
+# changes, and every 'hdr_every' rows (if non-zero).  'title' is an optional
+# function that is given the list of column widths and returns any lines to
+# be written above the column headings.
+#
+class TableRenderer:
+    """Render a table in batches of rows"""
+
+    def __init__(self, columns, hdr_every=0, title=None, out=None):
+        self._columns = columns
+        self._widths = [col.width for col in columns]
+        self._grow = [i for i, col in enumerate(columns) if col.grow]
+        self._hdr_every = hdr_every
+        self._title = title
+        self._out = out
+        self._count = 0
+        self._fmt = None
+        self._hdr = None
+
+    @property
+    def widths(self):
+        return self._widths
+
+    def need_header(self):
+        """Write the heading again before the next row"""
+        self._fmt = None
+
+    def _check_widths(self, rows):
+        """Increase the widths of the growable columns to fit the rows.
+        Returns True if any width changed.
+
+        """
+        changed = False
+
+        for i in self._grow:
+            width = max(len(str(row[i])) for row in rows)
+            if width > self._widths[i]:
+                self._widths[i] = width
+                changed = True
+
+        if not changed:
+            return False
+
+        # Columns in a group share the widest width of the group
+        groups = {}
+        for col, width in zip(self._columns, self._widths):
+            if col.group:
+                groups[col.group] = max(groups.get(col.group, 0), width)
+
+        for i, col in enumerate(self._columns):
+            if col.group:
+                self._widths[i] = groups[col.group]
+
+        return True
+
+    def _build(self):
+        """Build the row format string and the heading for the current
+        widths.
+
+        """
+        fmt = ""
+
+        for i, (col, width) in enumerate(zip(self._columns, self._widths)):
+            if i > 0:
+                fmt += col.sep
+
+            if width == 0:
+                fmt += "%s"
+            elif col.left:
+                fmt += "%%-%ds" % (width)
+            else:
+                fmt += "%%%ds" % (width)
+
+        self._fmt = fmt + "\n"
+
+        hdr = ""
+        if self._title:
+            hdr = self._title(self._widths)
+
+        self._hdr = hdr + self._fmt % tuple(col.title
+                                            for col in self._columns)
+
+    def render(self, rows):
+        """Write a batch of rows"""
+
+        if not rows:
+            return
+
+        out = self._out or sys.stdout
+
+        if self._check_widths(rows) or not self._fmt:
+            self._build()
+            need_hdr = True
+        else:
+            need_hdr = False
+
+        fmt = self._fmt
+        every = self._hdr_every
+
+        if not every:
+            if need_hdr:
+                out.write(self._hdr)
+            out.write("".join([fmt % row for row in rows]))
+            self._count += len(rows)
+            return
+
+        start = 0
+        while start < len(rows):
+            if need_hdr or self._count % every == 0:
+                out.write(self._hdr)
+                need_hdr = False
+
+            end = start + every - self._count % every
+            chunk = rows[start:end]
+            out.write("".join([fmt % row for row in chunk]))
+
+            self._count += len(chunk)
+            start = end
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 #
-# Copyright (c) 2019, AT&T Intellectual Property.
+# Copyright (c) 2019-2021, AT&T Intellectual Property.
 # All rights reserved.
 #
 # SPDX-License-Identifier: LGPL-2.1-only
@@ -9,16 +9,32 @@
 The module that defines the ResGrpConfig class.
 """
 
+import hashlib
+import json
+
+from vyatta.npf.npf_dscp import DSCP_MAX, dscp_value
 from vyatta.res_grp.res_grp_dscp_group import DscpGroup
 
 
+def config_fingerprint(config_dict):
+    """ Return a hash of a whole JSON configuration """
+    canonical = json.dumps(config_dict, sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
 class ResGrpConfig:
     """
     A class to represent all the chunks of Resources Group config.
+
+    The dscp-group objects are only created when they are asked for, so
+    that an old configuration can be compared with a new one using just the
+    fingerprints of its groups.
     """
     def __init__(self, config_dict):
         """ Create a ResGrpConfig object """
+        self._dscp_group_dicts = {}
         self._dscp_groups = {}
+        self._dscp_index = None
 
         try:
             res_dict = config_dict['vyatta-resources-v1:resources']
@@ -30,16 +46,57 @@ class ResGrpConfig:
             pass
 
     def _process_dscp_groups(self, dscp_group_list):
-        """ Process the dscp-group list to create dscp-group objects """
+        """ Index the dscp-group list by name """
         for dscp_group_dict in dscp_group_list:
-            dscp_group = DscpGroup(dscp_group_dict)
-            self._dscp_groups[dscp_group.name] = dscp_group
+            self._dscp_group_dicts[dscp_group_dict['group-name']] = \
+                dscp_group_dict
 
     @property
     def dscp_groups(self):
         """ Return the dictionary of dscp-groups, keyed by name. """
-        return self._dscp_groups
+        return {name: self.get_dscp_group(name)
+                for name in self._dscp_group_dicts}
+
+    @property
+    def dscp_group_names(self):
+        """ Return the list of dscp-group names """
+        return list(self._dscp_group_dicts)
 
     def get_dscp_group(self, name):
         """ Return the specified dscp-group, or None if it doesn't exist. """
-        return self._dscp_groups.get(name)
+        dscp_group = self._dscp_groups.get(name)
+        if dscp_group is None and name in self._dscp_group_dicts:
+            dscp_group = DscpGroup(self._dscp_group_dicts[name])
+            self._dscp_groups[name] = dscp_group
+        return dscp_group
+
+    def _build_dscp_index(self):
+        """
+        Build the index of dscp value to the names of the dscp-groups that
+        contain it
+        """
+        self._dscp_index = [[] for _ in range(DSCP_MAX + 1)]
+        for name, dscp_group in self.dscp_groups.items():
+            for dscp in dscp_group.dscp_set:
+                self._dscp_index[dscp].append(name)
+
+    def groups_with_dscp(self, dscp):
+        """
+        Return the list of names of the dscp-groups that contain the
+        specified dscp value, given as a name or number
+        """
+        if self._dscp_index is None:
+            self._build_dscp_index()
+        return list(self._dscp_index[dscp_value(dscp)])
+
+    @property
+    def fingerprints(self):
+        """
+        Return the fingerprints of all the groups, as a dictionary of
+        group type to a dictionary of the fingerprint of each group, keyed
+        by name.
+        """
+        return {
+            'dscp-group': {name: self.get_dscp_group(name).fingerprint
+                           for name in self._dscp_group_dicts}
+        }
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 #
-# Copyright (c) 2019, AT&T Intellectual Property.
+# Copyright (c) 2019-2021, AT&T Intellectual Property.
 # All rights reserved.
 #
 # SPDX-License-Identifier: LGPL-2.1-only
@@ -9,39 +9,74 @@
 The module that defines the resources group dscp-group class.
 """
 
+import hashlib
+import json
+
+# DSCPTABLE is re-exported for existing importers of this module
+from vyatta.npf.npf_dscp import DSCPTABLE, DSCP_MAX, dscp_value  # noqa: F401
+
 DSCP_CMD = "dscp-group"
 
 RG_BASE = "resources group"
 BASE_DSCP_PATH = RG_BASE + " " + DSCP_CMD
 
-"""
-DSCP name-to-id conversion table
-"""
-DSCPTABLE = {
-    'default': 0,
-    'cs0':     0,
-    'cs1':     8,
-    'cs2':     16,
-    'cs3':     24,
-    'cs4':     32,
-    'cs5':     40,
-    'cs6':     48,
-    'cs7':     56,
-    'af11':    10,
-    'af12':    12,
-    'af13':    14,
-    'af21':    18,
-    'af22':    20,
-    'af23':    22,
-    'af31':    26,
-    'af32':    28,
-    'af33':    30,
-    'af41':    34,
-    'af42':    36,
-    'af43':    38,
-    'ef':      46,
-    'va':      44,
-}
+
+class DscpSet:
+    """
+    An immutable set of dscp values, held as a 64-bit mask with bit N set
+    for dscp value N.  Equality, hashing, union, intersection and membership
+    are all single integer operations.
+    """
+    __slots__ = ('_mask',)
+
+    def __init__(self, mask=0):
+        """ Create a dscp set from a mask """
+        self._mask = mask
+
+    @classmethod
+    def from_values(cls, values):
+        """ Create a dscp set from an iterable of dscp names or numbers """
+        mask = 0
+        for dscp in values:
+            mask |= 1 << dscp_value(dscp)
+        return cls(mask)
+
+    @property
+    def mask(self):
+        """ Return the 64-bit mask of this dscp set """
+        return self._mask
+
+    def __eq__(self, dscp_set):
+        return self._mask == dscp_set.mask
+
+    def __hash__(self):
+        return hash(self._mask)
+
+    def __or__(self, dscp_set):
+        return DscpSet(self._mask | dscp_set.mask)
+
+    def __and__(self, dscp_set):
+        return DscpSet(self._mask & dscp_set.mask)
+
+    def __bool__(self):
+        return self._mask != 0
+
+    def __len__(self):
+        return bin(self._mask).count("1")
+
+    def __contains__(self, dscp):
+        return (self._mask >> dscp_value(dscp)) & 1 == 1
+
+    def __iter__(self):
+        """ Iterate over the dscp values, in ascending order """
+        mask = self._mask
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def __repr__(self):
+        return f"DscpSet({list(self)})"
 
 
 class DscpGroup:
@@ -52,41 +87,61 @@ class DscpGroup:
         """ Create a dscp-group object """
         self._dscp_group_dict = dscp_group_dict
         self._name = dscp_group_dict['group-name']
-        self._dscp_values = []
-        for dscp_value in dscp_group_dict['dscp']:
-            self._dscp_values.append(DSCPTABLE.get(dscp_value, dscp_value))
+        self._dscp_set = DscpSet.from_values(dscp_group_dict['dscp'])
+        self._fingerprint = None
 
     def __eq__(self, dscp_group):
-        """ Compare the original JSON config dictionary of two dscp-groups """
-        return self._dscp_group_dict == dscp_group.dscp_group_dict
+        """ Compare the names and dscp sets of two dscp-groups """
+        return self._name == dscp_group.name and \
+            self._dscp_set == dscp_group.dscp_set
+
+    def __hash__(self):
+        return hash((self._name, self._dscp_set))
 
     @property
     def name(self):
         """ Return the dscp-group's name """
         return self._name
 
+    @property
+    def dscp_set(self):
+        """ Return the DscpSet of the dscp-values of this dscp-group """
+        return self._dscp_set
+
     @property
     def dscp_values(self):
-        """ Return the list of dscp-values assigned to this dscp-group """
-        return self._dscp_values
+        """ Return the sorted list of dscp-values of this dscp-group """
+        return list(self._dscp_set)
+
+    def overlaps(self, dscp_group):
+        """ Return True if this dscp-group shares any dscp-values with another """
+        return bool(self._dscp_set & dscp_group.dscp_set)
 
     @property
     def dscp_group_dict(self):
         """ Return the original JSON config dictionary of this dscp-group """
         return self._dscp_group_dict
 
+    @property
+    def fingerprint(self):
+        """
+        Return a hash of the canonical form of this dscp-group: its name and
+        the sorted set of its dscp values, with any names converted to
+        numbers.  Two dscp-groups that program the dataplane the same way
+        have the same fingerprint.
+        """
+        if self._fingerprint is None:
+            canonical = json.dumps([self._name, self.dscp_values])
+            self._fingerprint = hashlib.sha256(
+                canonical.encode()).hexdigest()
+        return self._fingerprint
+
     def commands(self):
         """
         Generate a list of (path, command) tuples required to create this RG
         dscp-group
         """
-        dscp_values = ""
-        for dscp in sorted(self._dscp_values, key=int):
-            if dscp_values != "":
-                dscp_values += ";"
-
-            dscp_values += f"{dscp}"
-
+        dscp_values = ";".join(str(dscp) for dscp in self._dscp_set)
         path = f"{BASE_DSCP_PATH} {self._name} dscp"
         cmd = f"npf-cfg add dscp-group:{self._name} 0 {dscp_values}"
         return [(path, cmd)]
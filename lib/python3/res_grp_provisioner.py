@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 #
-# Copyright (c) 2020, AT&T Intellectual Property.
+# Copyright (c) 2020-2021, AT&T Intellectual Property.
 # All rights reserved.
 #
 # SPDX-License-Identifier: LGPL-2.1-only
@@ -26,70 +26,112 @@ class Provisioner:
     _obj_delete list.  For existing objects that have been modified by the new
     configurartion, the old objects are added to the _obj_delete list and the
     new objects are added to the _obj_create list.
+
+    Objects are compared by their fingerprints.  The fingerprints of the old
+    configuration may be given, as saved from the last commit, in which case
+    the old objects are only created for those that are deleted or modified.
+    The old configuration may be given as JSON or as a ResGrpConfig.
+
+    The commands to delete and create the objects are then collected into a
+    single change set, deletes first, with each cstore key and action only
+    appearing once.  The cstore keys apply to all dataplanes ("ALL"), so the
+    change set is written to vplaned once, however many dataplanes there are.
+    Nothing at all is written if nothing has changed.
     """
-    def __init__(self, old, new):
+    def __init__(self, old, new, old_fingerprints=None):
         """ Create a provisioner object """
         self._obj_delete = []
         self._obj_create = []
+        self._changes = {}
 
-        old_config = ResGrpConfig(old)
+        if isinstance(old, ResGrpConfig):
+            old_config = old
+        else:
+            old_config = ResGrpConfig(old)
         new_config = ResGrpConfig(new)
+        self._new_config = new_config
+
+        # Only trust saved fingerprints that match the old config's groups
+        if old_fingerprints is None or \
+           set(old_fingerprints.get('dscp-group', {})) != \
+           set(old_config.dscp_group_names):
+            old_fingerprints = old_config.fingerprints
 
-        self._check_dscp_groups(old_config, new_config)
+        self._fingerprints = new_config.fingerprints
 
-    def _check_dscp_groups(self, old_config, new_config):
+        self._check_dscp_groups(old_config, new_config,
+                                old_fingerprints['dscp-group'])
+        self._build_changes()
+
+    def _check_dscp_groups(self, old_config, new_config, old_fingerprints):
         """ Check for any changes to dscp-groups """
-        for dscp_group in new_config.dscp_groups.values():
-            old_dscp_group = old_config.get_dscp_group(dscp_group.name)
-            if old_dscp_group is not None:
-                # We have an existing dscp-group, has it changed?
-                if dscp_group != old_dscp_group:
-                    # It has changed, delete the old, create the new
-                    self._obj_delete.append(old_dscp_group)
-                    self._obj_create.append(dscp_group)
-            else:
-                # We have a new dscp-group
-                self._obj_create.append(dscp_group)
-
-        for dscp_group in old_config.dscp_groups.values():
-            new_dscp_group = new_config.get_dscp_group(dscp_group.name)
-            if new_dscp_group is None:
+        new_fingerprints = self._fingerprints['dscp-group']
+
+        for name, fingerprint in new_fingerprints.items():
+            old_fingerprint = old_fingerprints.get(name)
+            if old_fingerprint == fingerprint:
+                # Unchanged
+                continue
+
+            if old_fingerprint is not None:
+                # It has changed, delete the old, create the new
+                self._obj_delete.append(old_config.get_dscp_group(name))
+
+            # A new or modified dscp-group
+            self._obj_create.append(new_config.get_dscp_group(name))
+
+        for name in old_fingerprints:
+            if name not in new_fingerprints:
                 # Delete the old dscp-group
-                self._obj_delete.append(dscp_group)
-
-    def _delete_objects(self, ctrl):
-        """ Delete any old objects. """
-        for dataplane in ctrl.get_dataplanes():
-            with dataplane:
-                for obj in self._obj_delete:
-                    (path, cmd) = obj.delete_cmd()
-                    ctrl.store(path, cmd, "ALL", "DELETE")
-                    LOG.debug(f"delete {cmd}")
-
-    def _create_objects(self, ctrl):
-        """ Create any new or modified objects. """
-        for dataplane in ctrl.get_dataplanes():
-            with dataplane:
-                for obj in self._obj_create:
-                    for (path, cmd) in obj.commands():
-                        ctrl.store(path, cmd, "ALL", "SET")
-                        LOG.debug(f"set {cmd}")
-
-    def _qos_commit(self, ctrl):
+                self._obj_delete.append(old_config.get_dscp_group(name))
+
+    def _add_change(self, path, cmd, action):
         """
-        Send a 'qos commit' to the dataplane to tell QoS that it needs to
+        Add a command to the change set.  A later command for the same key
+        and action replaces an earlier one, as it would in the cstore.
+        """
+        key = (path, action)
+        self._changes.pop(key, None)
+        self._changes[key] = cmd
+
+    def _build_changes(self):
+        """
+        Build the change set to delete any old objects, create any new or
+        modified objects, and then, if there were any, tell QoS to
         re-evaluate any resources groups that it refers to
         """
-        for dataplane in ctrl.get_dataplanes():
-            with dataplane:
-                ctrl.store("qos commit", "qos commit", "ALL", "SET")
-                LOG.debug("set qos commit")
+        for obj in self._obj_delete:
+            (path, cmd) = obj.delete_cmd()
+            self._add_change(path, cmd, "DELETE")
+
+        for obj in self._obj_create:
+            for (path, cmd) in obj.commands():
+                self._add_change(path, cmd, "SET")
+
+        if self._changes:
+            self._add_change("qos commit", "qos commit", "SET")
+
+    @property
+    def fingerprints(self):
+        """ Return the fingerprints of the new configuration """
+        return self._fingerprints
+
+    @property
+    def new_config(self):
+        """ Return the new configuration as a ResGrpConfig """
+        return self._new_config
+
+    @property
+    def changes(self):
+        """ Return the change set as a list of (path, cmd, action) tuples """
+        return [(path, cmd, action)
+                for (path, action), cmd in self._changes.items()]
 
     def commands(self, ctrl):
         """
         Write the necessary commands to vplaned's cstore to delete, modify
         and create the required resources group objects
         """
-        self._delete_objects(ctrl)
-        self._create_objects(ctrl)
-        self._qos_commit(ctrl)
+        for (path, cmd, action) in self.changes:
+            ctrl.store(path, cmd, "ALL", action)
+            LOG.debug(f"{action.lower()} {cmd}")
@@ -1,12 +1,23 @@
 #!/usr/bin/env python3
 #
-# Copyright (c) 2019-2020, AT&T Intellectual Property.
+# Copyright (c) 2019-2021, AT&T Intellectual Property.
 # All rights reserved.
 #
 # SPDX-License-Identifier: LGPL-2.1-only
 #
 """
-The module that defines the resources group epheremal VCI module.
+The module that defines the resources group VCI module.
+
+It runs as a persistent VCI component.  This keeps the committed config, and
+the fingerprints of its groups, in memory, and holds its connection to the
+vplane-controller open between commits.
+
+The --action entry points run a single action against the saved config and
+exit.  They are not used by the component, but are kept for debugging when
+it is not running, e.g. to show the saved config (--action get-config) or
+to apply a config read from stdin (--action commit).  An action that changes
+the config must not be run while the component is running, as the component
+would not see the change.
 """
 
 import argparse
@@ -16,13 +27,17 @@ import logging.handlers
 import sys
 import traceback
 
+import vci
+
 from systemd.journal import JournalHandler
 
 from vplaned import Controller, ControllerException
 
+from vyatta.res_grp.res_grp_config import ResGrpConfig, config_fingerprint
 from vyatta.res_grp.res_grp_provisioner import Provisioner
 
 RESOURCES_GROUP_CONFIG_FILE = '/etc/vyatta/res-grp.json'
+RESOURCES_GROUP_FINGERPRINT_FILE = '/etc/vyatta/res-grp-fingerprints.json'
 
 
 def get_saved_config():
@@ -47,16 +62,33 @@ def save_new_config(config):
         write_file.write(json.dumps(config, indent=4, sort_keys=True))
 
 
-def start():
-    """ Start the daemon listening on the Dbus """
-    LOG.debug("res-grp-vci:start")
-    return 0
+def get_saved_fingerprints(config):
+    """
+    Return the saved fingerprints of the groups in the saved configuration,
+    or None if there are none or they were saved for a different
+    configuration.
+    """
+    try:
+        with open(RESOURCES_GROUP_FINGERPRINT_FILE) as json_data:
+            saved = json.load(json_data)
 
+    except (OSError, json.JSONDecodeError):
+        return None
 
-def stop():
-    """ Stop the daemon listening on the Dbus """
-    LOG.debug("res-grp-vci:stop")
-    return 0
+    if saved.get('config') != config_fingerprint(config):
+        return None
+
+    return saved.get('groups')
+
+
+def save_new_fingerprints(config, fingerprints):
+    """
+    Save the fingerprints of the groups in the new configuration, along with
+    the fingerprint of the configuration itself
+    """
+    with open(RESOURCES_GROUP_FINGERPRINT_FILE, "w") as write_file:
+        write_file.write(json.dumps({'config': config_fingerprint(config),
+                                     'groups': fingerprints}))
 
 
 def validate():
@@ -77,11 +109,13 @@ def commit():
     LOG.debug("res-grp-vci:commit")
     new_config = json.load(sys.stdin)
     old_config = get_saved_config()
-    prov = Provisioner(old_config, new_config)
+    prov = Provisioner(old_config, new_config,
+                       get_saved_fingerprints(old_config))
     try:
         with Controller() as ctrl:
             prov.commands(ctrl)
             save_new_config(new_config)
+            save_new_fingerprints(new_config, prov.fingerprints)
             status = 0
 
     except ControllerException:
@@ -109,9 +143,104 @@ def get_state():
     return 0
 
 
+class Config(vci.Config):
+    """
+    The Configuration mode class of the persistent VCI component
+    """
+    def __init__(self):
+        """ Load the last saved configuration """
+        super().__init__()
+        self._json_config = get_saved_config()
+        self._config = ResGrpConfig(self._json_config)
+        self._fingerprints = get_saved_fingerprints(self._json_config)
+        self._ctrl = None
+
+    def _controller(self):
+        """ Return the vplane-controller connection, connecting if needed """
+        if self._ctrl is None:
+            ctrl = Controller()
+            self._ctrl = ctrl.__enter__()
+        return self._ctrl
+
+    def _disconnect(self):
+        """ Drop the vplane-controller connection """
+        ctrl = self._ctrl
+        self._ctrl = None
+        if ctrl is not None:
+            try:
+                ctrl.__exit__(None, None, None)
+            except ControllerException:
+                pass
+
+    def set(self, new_json_config):
+        """
+        Compare the new configuration against the one in memory, and
+        write any dataplane configuration commands to the vplane-controller.
+        If the connection to the vplane-controller has gone, reconnect and
+        write all the commands again.
+        """
+        LOG.debug("res-grp-vci:Config:set")
+        prov = Provisioner(self._config, new_json_config, self._fingerprints)
+
+        if prov.changes:
+            try:
+                prov.commands(self._controller())
+
+            except ControllerException:
+                LOG.info("Reconnecting to vplane-controller")
+                self._disconnect()
+                try:
+                    prov.commands(self._controller())
+                except ControllerException:
+                    LOG.error("Failed to connect to vplane-controller: "
+                              f"{sys.exc_info()[0]}")
+                    self._disconnect()
+                    raise
+
+        save_new_config(new_json_config)
+        save_new_fingerprints(new_json_config, prov.fingerprints)
+
+        self._json_config = new_json_config
+        self._config = prov.new_config
+        self._fingerprints = prov.fingerprints
+
+    def get(self):
+        """ Return the committed configuration """
+        LOG.debug("res-grp-vci:Config:get")
+        return self._json_config
+
+    def check(self, proposed_config):
+        """ Nothing to do, Yang provides all the validation needed """
+        LOG.debug("res-grp-vci:Config:check")
+
+
+class State(vci.State):
+    """
+    The State mode class of the persistent VCI component
+    """
+    def get(self):
+        """ Return any op-mode state, current resources group has none. """
+        LOG.debug("res-grp-vci:State:get")
+        return {}
+
+
+def run():
+    """
+    Run as a persistent VCI component.  The component and model names date
+    from when it was run by ephemerad, and are kept as they are its identity
+    on the bus.
+    """
+    LOG.debug("res-grp-vci:run")
+    (vci.Component("net.vyatta.vci.ephemeral.res-grp")
+     .model(vci.Model("net.vyatta.vci.ephemeral.res-grp.v1")
+            .config(Config())
+            .state(State()))
+     .run()
+     .wait())
+    return 0
+
+
 FUNCTION_DICT = {
-    "start": start,
-    "stop": stop,
     "validate": validate,
     "commit": commit,
     "get-config": get_config,
@@ -120,8 +249,10 @@ FUNCTION_DICT = {
 
 if __name__ == "__main__":
     try:
-        PARSER = argparse.ArgumentParser(description='Resources Group ephemeral VCI Service')
-        PARSER.add_argument('--action', action='store', help='The requested action')
+        PARSER = argparse.ArgumentParser(description='Resources Group VCI Service')
+        PARSER.add_argument('--action', action='store',
+                            help='The requested action, or none to run as a persistent '
+                            'VCI component')
         PARSER.add_argument('--debug', action='store_true', help='Enable debugging')
         ARGS = PARSER.parse_args()
         logging.root.addHandler(JournalHandler(SYSLOG_IDENTIFIER='vyatta-res-grp-vci'))
@@ -131,7 +262,10 @@ if __name__ == "__main__":
             LOG.setLevel(logging.DEBUG)
             LOG.debug("Debug enabled")
 
-        RESULT = FUNCTION_DICT[ARGS.action]()
+        if ARGS.action is None:
+            RESULT = run()
+        else:
+            RESULT = FUNCTION_DICT[ARGS.action]()
 
     except Exception:
         traceback.print_exc()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2021, AT&T Intellectual Property.
+# All rights reserved.
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+
+"""
+Unit-tests for the npf_cgnat.py module.
+"""
+
+from vyatta.npf.npf_cgnat import PortBlockUtilization
+
+
+def apm_entry(address, blocks):
+    """ An 'apm' entry with the given {block: {protocol: ports_used}} """
+    return {
+        'address': address,
+        'port_start': 1024,
+        'port_end': 65535,
+        'nblocks': 4,
+        'blocks': [
+            {
+                'block': block,
+                'protocols': [
+                    {'protocol': name, 'ports_used': used}
+                    for name, used in protocols.items()
+                ]
+            }
+            for block, protocols in blocks.items()
+        ]
+    }
+
+
+def test_port_block_utilization_per_protocol():
+    """ Entries for the same address and block with different protocols
+    are all counted, and later entries for the same block and protocol are
+    dropped rather than summed """
+    util = PortBlockUtilization()
+
+    util.add(apm_entry('1.1.1.1', {0: {'tcp': 10}, 1: {'tcp': 5}}))
+    util.add(apm_entry('1.1.1.1', {0: {'udp': 3}, 2: {'udp': 7}}))
+
+    # The same entry again, e.g. from a second dataplane
+    util.add(apm_entry('1.1.1.1', {0: {'udp': 3}, 2: {'udp': 7}}))
+
+    # The same block and protocol with a different count is not summed
+    util.add(apm_entry('1.1.1.1', {1: {'tcp': 9}}))
+
+    result = util.summary()
+    assert len(util) == 1
+
+    addr = result['addresses'][0]
+    assert addr['blocks_used'] == 3
+    assert addr['blocks_free'] == 1
+    assert addr['ports_used'] == 25
+    assert addr['bitmap'] == "0x7"
+
+    assert result['summary']['ports_used'] == {'tcp': 15, 'udp': 10}
+    assert result['summary']['utilization'] == 75.0
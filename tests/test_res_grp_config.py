@@ -57,3 +57,23 @@ def test_rgconfig():
     assert config.get_dscp_group("group-c") is not None
     assert config.get_dscp_group("group-d") is not None
     assert config.get_dscp_group("group-e") is None
+
+
+def test_rgconfig_fingerprints():
+    """ Check the fingerprints of the groups in the config """
+    config = ResGrpConfig(TEST_DATA)
+    fingerprints = config.fingerprints['dscp-group']
+    assert list(fingerprints) == ['group-a', 'group-b', 'group-c', 'group-d']
+    assert fingerprints['group-a'] == \
+        config.get_dscp_group('group-a').fingerprint
+    assert len(set(fingerprints.values())) == 4
+    assert ResGrpConfig({}).fingerprints == {'dscp-group': {}}
+
+
+def test_rgconfig_dscp_index():
+    """ Check the index of dscp value to dscp-groups """
+    config = ResGrpConfig(TEST_DATA)
+    assert config.groups_with_dscp('0') == ['group-a']
+    assert config.groups_with_dscp('cs2') == ['group-b']
+    assert config.groups_with_dscp(63) == ['group-d']
+    assert ResGrpConfig({}).groups_with_dscp('ef') == []
@@ -12,7 +12,7 @@ Unit-tests for the dscp_group.py module.
 
 import pytest
 
-from vyatta.res_grp.res_grp_dscp_group import DscpGroup
+from vyatta.res_grp.res_grp_dscp_group import DscpGroup, DscpSet
 
 TEST_DATA = [
     (
@@ -107,3 +107,49 @@ def test_profile(test_input, expected_result):
     assert dscp_group.commands() == expected_result
     _, cmd = dscp_group.delete_cmd()
     assert cmd == f"npf-cfg delete dscp-group:{dscp_group.name}"
+
+
+def test_fingerprint():
+    """ Check that equivalent dscp-groups have the same fingerprint """
+    dscp_group = DscpGroup({'group-name': 'group-a', 'dscp': ['cs1', '0']})
+    same = DscpGroup({'group-name': 'group-a', 'dscp': ['0', '8', 'cs0']})
+    other_values = DscpGroup({'group-name': 'group-a', 'dscp': ['0', '9']})
+    other_name = DscpGroup({'group-name': 'group-b', 'dscp': ['0', '8']})
+
+    assert dscp_group.fingerprint == same.fingerprint
+    assert dscp_group == same
+    assert dscp_group != other_values
+    assert dscp_group != other_name
+
+
+def test_dscp_set():
+    """ Unit-test the bitmask-backed dscp set """
+    dscp_set = DscpSet.from_values(['cs1', '0', '63', 'ef'])
+    assert dscp_set.mask == (1 << 0) | (1 << 8) | (1 << 46) | (1 << 63)
+    assert list(dscp_set) == [0, 8, 46, 63]
+    assert len(dscp_set) == 4
+    assert 'cs1' in dscp_set
+    assert 46 in dscp_set
+    assert '1' not in dscp_set
+
+    other = DscpSet.from_values(['8', '9'])
+    assert list(dscp_set | other) == [0, 8, 9, 46, 63]
+    assert list(dscp_set & other) == [8]
+    assert not DscpSet.from_values(['1']) & other
+    assert DscpSet.from_values(['default', '8']) == \
+        DscpSet.from_values(['cs1', 'cs0'])
+    assert len({DscpSet.from_values(['8']), DscpSet.from_values(['cs1'])}) == 1
+
+    with pytest.raises(ValueError):
+        DscpSet.from_values(['64'])
+
+
+def test_dscp_group_overlaps():
+    """ Check whether dscp-groups share any dscp values """
+    group_a = DscpGroup({'group-name': 'group-a', 'dscp': ['0', 'cs1']})
+    group_b = DscpGroup({'group-name': 'group-b', 'dscp': ['8', '9']})
+    group_c = DscpGroup({'group-name': 'group-c', 'dscp': ['10']})
+
+    assert group_a.overlaps(group_b)
+    assert not group_a.overlaps(group_c)
+    assert group_a.dscp_values == [0, 8]
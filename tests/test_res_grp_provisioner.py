@@ -14,6 +14,7 @@ from unittest.mock import Mock, MagicMock
 
 import pytest
 
+from vyatta.res_grp.res_grp_config import ResGrpConfig
 from vyatta.res_grp.res_grp_provisioner import Provisioner
 
 
@@ -111,3 +112,98 @@ def test_provisioner(test_input, expected_result):
     prov.commands(ctrl)
     for call_args in expected_result:
         ctrl.store.assert_any_call(*call_args)
+
+
+def _dscp_groups_config(groups):
+    """ Build a resources group config from a dictionary of dscp-groups """
+    return {
+        'vyatta-resources-v1:resources': {
+            'vyatta-resources-group-misc-v1:group': {
+                'vyatta-resources-dscp-group-v1:dscp-group': [
+                    {'group-name': name, 'dscp': dscp}
+                    for name, dscp in groups.items()
+                ]
+            }
+        }
+    }
+
+
+def test_provisioner_change_set():
+    """
+    Check that each change is stored once, whatever the number of
+    dataplanes, with the deletes before the creates
+    """
+    mock_dataplanes = [MagicMock() for _ in range(4)]
+    for mock_dataplane in mock_dataplanes:
+        mock_dataplane.__enter__.return_value = mock_dataplane
+
+    attrs = {
+        'get_dataplanes.return_value': mock_dataplanes,
+        'store.return_value': 0
+    }
+    ctrl = Mock(**attrs)
+
+    old = _dscp_groups_config({'group-a': ['0', '1'], 'group-b': ['2']})
+    new = _dscp_groups_config({'group-a': ['0', '1', '3'],
+                               'group-c': ['cs1']})
+
+    prov = Provisioner(old, new)
+    prov.commands(ctrl)
+
+    assert [call.args for call in ctrl.store.call_args_list] == [
+        ('resources group dscp-group group-a',
+         'npf-cfg delete dscp-group:group-a', 'ALL', 'DELETE'),
+        ('resources group dscp-group group-b',
+         'npf-cfg delete dscp-group:group-b', 'ALL', 'DELETE'),
+        ('resources group dscp-group group-a dscp',
+         'npf-cfg add dscp-group:group-a 0 0;1;3', 'ALL', 'SET'),
+        ('resources group dscp-group group-c dscp',
+         'npf-cfg add dscp-group:group-c 0 8', 'ALL', 'SET'),
+        ('qos commit', 'qos commit', 'ALL', 'SET'),
+    ]
+
+
+def test_provisioner_unchanged():
+    """
+    Check that nothing, not even a qos commit, is stored if no group has
+    changed, and that saved fingerprints are used when they match
+    """
+    ctrl = Mock(**{'get_dataplanes.return_value': [],
+                   'store.return_value': 0})
+
+    old = _dscp_groups_config({'group-a': ['cs1', '0'], 'group-b': ['2']})
+    new = _dscp_groups_config({'group-a': ['0', '8'], 'group-b': ['2']})
+
+    prov = Provisioner(old, new)
+    prov.commands(ctrl)
+    ctrl.store.assert_not_called()
+    assert prov.changes == []
+
+    # Saved fingerprints for the same groups are trusted
+    saved = {'dscp-group': {'group-a': 'stale',
+                            'group-b': prov.fingerprints['dscp-group']
+                                                        ['group-b']}}
+    prov = Provisioner(old, new, saved)
+    assert [path for (path, _, _) in prov.changes] == [
+        'resources group dscp-group group-a',
+        'resources group dscp-group group-a dscp',
+        'qos commit'
+    ]
+
+    # But not if they are for different groups
+    saved = {'dscp-group': {'group-a': 'stale'}}
+    assert Provisioner(old, new, saved).changes == []
+
+
+def test_provisioner_old_config_object():
+    """
+    Check that the old config can be given as the ResGrpConfig of the last
+    commit, as the persistent VCI component does
+    """
+    old = _dscp_groups_config({'group-a': ['0', '1'], 'group-b': ['2']})
+    new = _dscp_groups_config({'group-a': ['0', '1', '3'],
+                               'group-c': ['cs1']})
+
+    prov = Provisioner(ResGrpConfig(old), new)
+    assert prov.changes == Provisioner(old, new).changes
+    assert list(prov.new_config.dscp_groups) == ['group-a', 'group-c']
@@ -21,10 +21,14 @@ LOG = logging.getLogger('GPC VCI')
 class Classifier:
     """
     A collection of classification rules.
+
+    The protobuf message is serialized once, when the classifier is built,
+    as the dataplanes may ask for it many times.
     """
     def __init__(self, classifier_config):
         """ Initialise classifier object """
 
+        self._config = classifier_config
         self._name = classifier_config['classifier-name']
         self._results = classifier_config['results']
         self._rules = []
@@ -42,10 +46,19 @@ class Classifier:
                     continue
                 self._rules.append(Rule(rule_dict, self._pb_message))
 
+        self._pb_bytes = self._pb_message.SerializeToString()
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug(f"MESSAGE {self._pb_message}")
+
     @property
     def name(self):
         return self._name
 
+    @property
+    def config(self):
+        """ The config dictionary the classifier was built from """
+        return self._config
+
     def pb_message(self):
-        LOG.debug(f"MESSAGE {self._pb_message}")
-        return self._pb_message.SerializeToString()
+        """ The serialized protobuf message """
+        return self._pb_bytes
@@ -22,17 +22,25 @@ GPC_NAMESPACE = "vyatta-resources-packet-classifier-v1"
 class GpcConfig:
     """
     A class to represent the GPC configuration.
+
+    A classifier whose config has not changed since the previous GpcConfig
+    (if given) is reused from it, along with its serialized protobuf
+    message, rather than being built again.  Only the classifiers whose
+    config has changed are listed as modified.
     """
-    def __init__(self, new_config, old_config):
+    def __init__(self, new_config, old_config, previous=None):
         """ Initialise config object """
         self._classifiers = {}
         self._modified_classifiers = []
 
-        old_class_names = self._get_classifier_names_from_config(old_config)
-        classifiers = self._build_classifiers_from_config(new_config)
+        old_classifiers = self._get_classifier_dicts_from_config(old_config)
+        classifiers = self._build_classifiers_from_config(new_config,
+                                                          previous)
 
-        for name in classifiers:
-            if name in old_class_names:
+        for name, classifier in classifiers.items():
+            old_classifier = old_classifiers.get(name)
+            if old_classifier is not None and \
+               old_classifier != classifier.config:
                 self._modified_classifiers.append(name)
 
         self._classifiers = classifiers
@@ -50,18 +58,19 @@ class GpcConfig:
 
         return classifier_list
 
-    def _get_classifier_names_from_config(self, cfg_dict):
-        """ Get a list of classifier names from config"""
-        names = []
+    def _get_classifier_dicts_from_config(self, cfg_dict):
+        """ Get a dictionary of classifier configs, keyed by name """
+        classifiers = {}
         classifier_list = self._get_classifier_config(cfg_dict)
 
         if classifier_list is not None:
             for classifier_dict in classifier_list:
-                names.append(classifier_dict['classifier-name'])
+                classifiers[classifier_dict['classifier-name']] = \
+                    classifier_dict
 
-        return names
+        return classifiers
 
-    def _build_classifiers_from_config(self, cfg_dict):
+    def _build_classifiers_from_config(self, cfg_dict, previous):
         """ Build a dictionary of classifiers """
         classifiers = {}
 
@@ -69,8 +78,13 @@ class GpcConfig:
 
         if classifier_list is not None:
             for classifier_dict in classifier_list:
-                classifier = Classifier(classifier_dict)
-                classifiers[classifier.name] = classifier
+                name = classifier_dict['classifier-name']
+                classifier = None
+                if previous is not None:
+                    classifier = previous.get_classifier(name)
+                if classifier is None or classifier.config != classifier_dict:
+                    classifier = Classifier(classifier_dict)
+                classifiers[name] = classifier
 
         return classifiers
 
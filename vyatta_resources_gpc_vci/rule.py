@@ -11,6 +11,7 @@ General Packet Classifier Rule - a classification rule within a classifier
 import logging
 import ipaddress
 from vyatta.proto import GPCConfig_pb2
+from vyatta.npf.npf_dscp import DSCPTABLE
 
 LOG = logging.getLogger('GPC VCI')
 
@@ -175,37 +176,11 @@ class Rule:
 
     def _match_dscp(self, match_val, rule_message):
         """ Build protobuf matches for dscp """
-        dscp_dict = {
-            'cs0': 0,
-            'cs1': 8,
-            'cs2': 16,
-            'cs3': 24,
-            'cs4': 32,
-            'cs5': 40,
-            'cs6': 48,
-            'cs7': 56,
-            'af11': 10,
-            'af12': 12,
-            'af13': 14,
-            'af21': 18,
-            'af22': 20,
-            'af23': 22,
-            'af31': 26,
-            'af32': 28,
-            'af33': 30,
-            'af41': 34,
-            'af42': 36,
-            'af43': 38,
-            'ef': 46,
-            'va': 44,
-            'default': 0,
-        }
-
         match_message = rule_message.matches.add()
 
         for dscp_format in match_val:
             if dscp_format == "name":
-                dscp_val = dscp_dict.get(match_val.get(dscp_format))
+                dscp_val = DSCPTABLE.get(match_val.get(dscp_format))
             else:
                 dscp_val = match_val.get(dscp_format)
 
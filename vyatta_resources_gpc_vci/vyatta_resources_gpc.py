@@ -75,7 +75,8 @@ class Config(vci.Config):
             old_json_config = self.json_config
 
         try:
-            gpc_config = GpcConfig(new_json_config, old_json_config)
+            gpc_config = GpcConfig(new_json_config, old_json_config,
+                                   gpc_config)
 
             save_config(new_json_config)
 
@@ -145,7 +146,7 @@ if __name__ == "__main__":
 
         while True:
             classifier_name = rep.recv_string()
-            LOG.debug(f"grp req {classifier_name}")
+            LOG.debug("grp req %s", classifier_name)
 
             reply = b"None"
             if gpc_config is not None:
@@ -154,7 +155,7 @@ if __name__ == "__main__":
                     reply = classifier.pb_message()
 
             rep.send(reply)
-            LOG.debug(f"sent grp {classifier_name}")
+            LOG.debug("sent grp %s", classifier_name)
 
     except Exception:
         LOG.error(f"Unexpected error: {sys.exc_info()[0]}")